@@ -2,8 +2,11 @@
 import json
 import numpy as np
 import argparse
+import sys
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
+
+# --titles verilirse sonuçlara eklenen alanlar (series_id indeksi ile tek tek okunur)
+RESULT_COLUMNS = ["year", "genres", "vote_average"]
 
 def resolve_store_dir(store_arg: str) -> Path:
     """
@@ -61,33 +64,130 @@ def load_store(store_dir: Path):
 
     return embeddings, meta
 
-def topk_search(model, embeddings: np.ndarray, meta: list, query: str, k: int = 5):
-    # query -> embedding
-    q = model.encode([query], normalize_embeddings=True, convert_to_numpy=True).astype(np.float32)[0]  # (D,)
+def open_title_store(store_arg: str):
+    """
+    --titles verildiğinde çağrılır. title_store.py data/ altında ve numpy'den başka
+    bağımlılığı yok; --titles kullanılmadığında recommend.py onsuz da çalışır.
+    """
+    sys.path.append(str(Path(__file__).resolve().parents[1] / "data"))
+    from title_store import TitleStore
+    return TitleStore(store_arg)
 
-    # normalize olduğu için cosine similarity = dot product
-    scores = embeddings @ q  # (N,)
+def load_priors(store_dir: Path, n_rows: int):
+    """
+    build_embeddings.py'nin yazdığı priors.npy (N, P) + priors.json (sütun isimleri).
+    Eski store'larda yoksa (None, []) döner; o zaman sadece cosine kullanılır.
+    """
+    priors_path = store_dir / "priors.npy"
+    info_path = store_dir / "priors.json"
+    if not priors_path.exists() or not info_path.exists():
+        return None, []
 
-    k = min(k, len(scores))
-    top_idx = np.argpartition(-scores, kth=k-1)[:k]
-    top_idx = top_idx[np.argsort(-scores[top_idx])]
+    priors = np.load(priors_path).astype(np.float32)
+    with info_path.open("r", encoding="utf-8") as f:
+        names = json.load(f).get("names") or []
 
-    results = []
-    for rank, idx in enumerate(top_idx, start=1):
-        results.append({
-            "rank": rank,
-            "series_id": meta[idx].get("series_id"),
-            "title": meta[idx].get("title"),
-            "score": float(scores[idx]),
-        })
-    return results
+    if priors.shape != (n_rows, len(names)):
+        raise ValueError(f"priors.npy şekli {priors.shape}, beklenen ({n_rows}, {len(names)}).")
+    return priors, names
+
+def prior_bias(priors: np.ndarray = None, weights=None):
+    """
+    Sorgudan bağımsız satır başı prior katkısı: P @ w  (N,).
+    Ağırlıkların hepsi 0 ise ya da prior yoksa None (ek maliyet yok).
+    """
+    if priors is None or weights is None or not np.any(weights):
+        return None
+    weights = np.asarray(weights, dtype=np.float32)
+    if priors.shape[1] != weights.size:
+        raise ValueError(f"{weights.size} ağırlık verildi, priors {priors.shape[1]} sütunlu.")
+    return priors @ weights
+
+def score_topk(embeddings: np.ndarray, qmat: np.ndarray, k: int, shard_rows: int = 0, bias: np.ndarray = None):
+    """
+    Batch sorgular için skor + top-k. qmat (B, D) -> (B, k) indeks ve skor.
+    bias (N,) verilirse her parçanın skoruna top-k seçiminden önce eklenir
+    (cosine + P @ w), yani blend aynı skorlama adımında yapılır.
+    shard_rows > 0 ise satırlar parça parça skorlanır, her parçanın top-k'sı
+    öncekilerle birleştirilir (bellek N*B yerine shard_rows*B).
+    """
+    n = embeddings.shape[0]
+    k = min(k, n)
+    step = shard_rows if shard_rows > 0 else n
+
+    best_idx = None
+    best_scores = None
+    for start in range(0, n, step):
+        scores = embeddings[start:start + step] @ qmat.T  # (n_shard, B)
+        if bias is not None:
+            scores += bias[start:start + step, None]
+        kk = min(k, scores.shape[0])
+        idx = np.argpartition(-scores, kth=kk - 1, axis=0)[:kk]
+        sc = np.take_along_axis(scores, idx, axis=0)
+        idx += start
+
+        if best_idx is not None:
+            idx = np.vstack([best_idx, idx])
+            sc = np.vstack([best_scores, sc])
+            if idx.shape[0] > k:
+                keep = np.argpartition(-sc, kth=k - 1, axis=0)[:k]
+                idx = np.take_along_axis(idx, keep, axis=0)
+                sc = np.take_along_axis(sc, keep, axis=0)
+        best_idx, best_scores = idx, sc
+
+    order = np.argsort(-best_scores, axis=0)
+    top_idx = np.take_along_axis(best_idx, order, axis=0).T
+    top_scores = np.take_along_axis(best_scores, order, axis=0).T
+    return top_idx, top_scores
+
+def topk_search_batch(model, embeddings: np.ndarray, meta: list, queries: list, k: int = 5,
+                      titles=None, priors: np.ndarray = None, weights=None, shard_rows: int = 0):
+    """
+    embeddings (N, D), priors (N, P) ve weights (P,) ham haliyle verilir;
+    prior katkısı çağrı başına bir kez hesaplanır ve tüm sorgularda paylaşılır.
+    """
+    # query -> embedding
+    q = model.encode(queries, normalize_embeddings=True, convert_to_numpy=True).astype(np.float32)  # (B, D)
+
+    # normalize olduğu için cosine similarity = dot product (+ prior @ w)
+    bias = prior_bias(priors, weights)
+    top_idx, top_scores = score_topk(embeddings, q, k, shard_rows, bias)
+
+    all_results = []
+    for b in range(q.shape[0]):
+        # sadece top-k satır için saf cosine'i de raporla
+        cosine = top_scores[b] if bias is None else top_scores[b] - bias[top_idx[b]]
+
+        results = []
+        for rank, (idx, score, cos) in enumerate(zip(top_idx[b], top_scores[b], cosine), start=1):
+            r = {
+                "rank": rank,
+                "series_id": meta[idx].get("series_id"),
+                "title": meta[idx].get("title"),
+                "score": float(score),
+                "cosine": float(cos),
+            }
+            if titles is not None:
+                # tüm dosyayı taramadan sadece bu dizinin satırı okunur
+                r.update(titles.get(r["series_id"], RESULT_COLUMNS) or {})
+            results.append(r)
+        all_results.append(results)
+    return all_results
+
+def topk_search(model, embeddings: np.ndarray, meta: list, query: str, k: int = 5,
+                titles=None, priors: np.ndarray = None, weights=None, shard_rows: int = 0):
+    return topk_search_batch(model, embeddings, meta, [query], k, titles, priors, weights, shard_rows)[0]
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--store", default="embedding", help="embeddings.npy + meta.json klasörü (örn: embedding)")
     parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2", help="Embedding model")
-    parser.add_argument("--query", required=True, help="User preference text")
+    parser.add_argument("--query", required=True, nargs="+", help="User preference text (birden fazla verilirse batch)")
     parser.add_argument("--k", type=int, default=5, help="Top K results")
+    parser.add_argument("--w_rating", type=float, default=0.0, help="Bayes puan prior ağırlığı (örn: 0.1)")
+    parser.add_argument("--w_popularity", type=float, default=0.0, help="log-popülerlik prior ağırlığı (örn: 0.05)")
+    parser.add_argument("--shard_rows", type=int, default=0, help="Skorlamayı bu kadar satırlık parçalarla yap (0=tek parça)")
+    parser.add_argument("--titles", default=None, help="Title store klasörü (örn: llm_titles.cols), sonuçlara yıl/tür ekler")
     args = parser.parse_args()
 
     store_dir = resolve_store_dir(args.store)
@@ -97,11 +197,28 @@ def main():
 
     print("Embeddings shape:", embeddings.shape, "| Meta:", len(meta))
 
+    priors, prior_names = load_priors(store_dir, len(meta))
+    prior_weights = {"rating_bayes": args.w_rating, "log_popularity": args.w_popularity}
+    weights = np.array([prior_weights.get(name, 0.0) for name in prior_names], dtype=np.float32)
+    if priors is None and (args.w_rating or args.w_popularity):
+        print("Uyarı: priors.npy yok, sadece cosine kullanılıyor (build_embeddings.py --priors_only).")
+
+    titles = open_title_store(args.titles) if args.titles else None
+
+    from sentence_transformers import SentenceTransformer
     model = SentenceTransformer(args.model)
 
-    results = topk_search(model, embeddings, meta, args.query, args.k)
-    for r in results:
-        print(f"{r['rank']}) {r['title']} (id={r['series_id']}) score={r['score']:.4f}")
+    batch = topk_search_batch(model, embeddings, meta, args.query, args.k, titles, priors, weights, args.shard_rows)
+    for query, results in zip(args.query, batch):
+        if len(args.query) > 1:
+            print(f"\nQuery: {query}")
+        for r in results:
+            line = f"{r['rank']}) {r['title']} (id={r['series_id']}) score={r['score']:.4f}"
+            if priors is not None and np.any(weights):
+                line += f" cosine={r['cosine']:.4f}"
+            if titles is not None:
+                line += f" | {r.get('year')} | {', '.join(r.get('genres') or [])} | vote={r.get('vote_average')}"
+            print(line)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,69 @@
+# recommend.py skorlama çekirdeği: sharded top-k + prior bias.
+# Çalıştırma: python -m pytest -q Retrieval
+
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+HERE = Path(__file__).resolve().parent
+
+spec = importlib.util.spec_from_file_location("recommend", HERE / "recommend.py")
+recommend = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(recommend)
+
+N, D, B, P = 23, 8, 3, 2
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    E = rng.standard_normal((N, D)).astype(np.float32)
+    Q = rng.standard_normal((B, D)).astype(np.float32)
+    priors = rng.random((N, P)).astype(np.float32)
+    w = np.array([0.3, 0.1], dtype=np.float32)
+    return E, Q, priors, w
+
+def reference_topk(scores: np.ndarray, k: int):
+    # (N, B) tam skor matrisinden tam sıralama
+    idx = np.argsort(-scores, axis=0, kind="stable")[:k].T
+    return idx, np.take_along_axis(scores, idx.T, axis=0).T
+
+@pytest.mark.parametrize("shard_rows", [0, 1, 5, N, N + 10])
+@pytest.mark.parametrize("k", [1, 4, N + 5])
+def test_score_topk_matches_full_scoring(data, shard_rows, k):
+    E, Q, priors, w = data
+    bias = recommend.prior_bias(priors, w)
+    ref_idx, ref_scores = reference_topk(E @ Q.T + (priors @ w)[:, None], min(k, N))
+
+    top_idx, top_scores = recommend.score_topk(E, Q, k, shard_rows, bias)
+
+    # k > N ise N sonuç döner
+    assert top_idx.shape == (B, min(k, N))
+    np.testing.assert_array_equal(top_idx, ref_idx)
+    np.testing.assert_allclose(top_scores, ref_scores, rtol=1e-5, atol=1e-6)
+
+@pytest.mark.parametrize("shard_rows", [0, 7])
+def test_score_topk_without_bias_is_cosine(data, shard_rows):
+    E, Q, _, _ = data
+    ref_idx, ref_scores = reference_topk(E @ Q.T, 5)
+
+    top_idx, top_scores = recommend.score_topk(E, Q, 5, shard_rows)
+
+    np.testing.assert_array_equal(top_idx, ref_idx)
+    np.testing.assert_allclose(top_scores, ref_scores, rtol=1e-5, atol=1e-6)
+
+def test_prior_bias(data):
+    _, _, priors, w = data
+
+    np.testing.assert_allclose(recommend.prior_bias(priors, w), priors @ w, rtol=1e-6)
+    # ağırlık yoksa ya da hepsi 0 ise ek maliyet yok
+    assert recommend.prior_bias(priors, np.zeros(P)) is None
+    assert recommend.prior_bias(None, w) is None
+    assert recommend.prior_bias(priors, None) is None
+
+def test_prior_bias_rejects_weight_mismatch(data):
+    _, _, priors, _ = data
+
+    with pytest.raises(ValueError):
+        recommend.prior_bias(priors, [0.3, 0.1, 0.2])
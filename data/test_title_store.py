@@ -0,0 +1,151 @@
+# title_store.py sütun formatının kenar durumları.
+# Çalıştırma: python -m pytest -q data
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+HERE = Path(__file__).resolve().parent
+sys.path.append(str(HERE))
+from title_store import TitleStore, write_store, import_jsonl, export_jsonl
+
+def roundtrip(tmp_path: Path, records):
+    store = TitleStore(write_store(records, tmp_path / "t.cols"))
+    return store, list(store.iter_records())
+
+def test_null_list_distinct_from_empty(tmp_path):
+    store, rows = roundtrip(tmp_path, [
+        {"series_id": 1, "genres": None},
+        {"series_id": 2, "genres": []},
+        {"series_id": 3, "genres": ["Dram", None]},
+    ])
+
+    assert store.kinds["genres"] == "list"
+    assert [r["genres"] for r in rows] == [None, [], ["Dram", None]]
+    assert store.null_mask("genres").tolist() == [True, False, False]
+    assert store.get(1, ["genres"]) == {"genres": None}
+    assert store.get(2, ["genres"]) == {"genres": []}
+
+def test_int_float_promotion_and_nulls(tmp_path):
+    store, rows = roundtrip(tmp_path, [
+        {"series_id": 1, "vote_average": 8, "vote_count": 10, "in_production": True},
+        {"series_id": 2, "vote_average": 7.5, "vote_count": None, "in_production": None},
+        {"series_id": 3, "vote_average": None, "vote_count": 3, "in_production": False},
+    ])
+
+    assert store.kinds["vote_average"] == "float"
+    assert store.kinds["vote_count"] == "int"
+    assert store.kinds["in_production"] == "bool"
+    # int/float karışık sütun float'a döner: 8 -> 8.0
+    assert [r["vote_average"] for r in rows] == [8.0, 7.5, None]
+    assert isinstance(rows[0]["vote_average"], float)
+    assert [r["vote_count"] for r in rows] == [10, None, 3]
+    assert [r["in_production"] for r in rows] == [True, None, False]
+    # sayısal sütunlar mmap'li ndarray olarak okunur
+    assert isinstance(store.column("vote_count"), np.ndarray)
+
+def test_mixed_types_fall_back_to_json(tmp_path):
+    store, rows = roundtrip(tmp_path, [
+        {"series_id": 1, "genre_ids": [18, 80]},
+        {"series_id": 2, "genre_ids": None},
+        {"series_id": 3, "genre_ids": "x"},
+    ])
+
+    assert store.kinds["genre_ids"] == "json"
+    assert [r["genre_ids"] for r in rows] == [[18, 80], None, "x"]
+
+def test_duplicate_series_id_last_wins_and_errors_skipped(tmp_path):
+    store, rows = roundtrip(tmp_path, [
+        {"series_id": 5, "title": "eski"},
+        {"series_id": 2, "title": "iki"},
+        {"series_id": 7, "error": "boom"},
+        {"series_id": 5, "title": "yeni"},
+    ])
+
+    assert len(store) == 2
+    # satır sırası ilk görülen sıradır, değer son kayıttır
+    assert [(r["series_id"], r["title"]) for r in rows] == [(5, "yeni"), (2, "iki")]
+    assert store.get(5, ["title"]) == {"title": "yeni"}
+    assert store.get(7) is None
+
+def test_missing_key_reads_as_null(tmp_path):
+    _, rows = roundtrip(tmp_path, [
+        {"series_id": 1, "tagline": "a"},
+        {"series_id": 2},
+    ])
+
+    assert rows[1] == {"series_id": 2, "tagline": None}
+
+def test_empty_and_null_string_columns(tmp_path):
+    store, rows = roundtrip(tmp_path, [
+        {"series_id": 1, "tagline": "", "overview": None},
+        {"series_id": 2, "tagline": "", "overview": None},
+    ])
+
+    # data.bin boş: mmap yerine np.zeros kullanılır
+    assert (store.dir / "tagline.data.bin").stat().st_size == 0
+    assert [r["tagline"] for r in rows] == ["", ""]
+    assert [r["overview"] for r in rows] == [None, None]
+    assert store.value("tagline", 1) == ""
+
+def test_get_missing_id(tmp_path):
+    store, _ = roundtrip(tmp_path, [{"series_id": 10, "title": "a"}, {"series_id": 30, "title": "c"}])
+
+    for sid in (5, 20, 40):
+        assert store.row_of(sid) is None
+        assert store.get(sid) is None
+    assert store.get(30) == {"series_id": 30, "title": "c"}
+    assert store.rows_of([30, 5, 10, 40]).tolist() == [1, -1, 0, -1]
+
+def test_float_column_nulls_as_nan(tmp_path):
+    store, _ = roundtrip(tmp_path, [
+        {"series_id": 1, "vote_count": 10, "title": "a"},
+        {"series_id": 2, "vote_count": None, "title": "b"},
+    ])
+
+    values = store.float_column("vote_count")
+    assert values.dtype == np.float64
+    assert values[0] == 10.0 and np.isnan(values[1])
+    with pytest.raises(KeyError):
+        store.float_column("title")
+
+def test_empty_store(tmp_path):
+    store, rows = roundtrip(tmp_path, [])
+
+    assert len(store) == 0
+    assert store.columns == []
+    assert rows == []
+    assert store.get(1) is None
+
+def test_rewrite_replaces_old_columns(tmp_path):
+    outdir = tmp_path / "t.cols"
+    write_store([{"series_id": 1, "title": "a", "keywords": ["x"]}], outdir)
+    write_store([{"series_id": 1, "title": "b"}], outdir)
+
+    store = TitleStore(outdir)
+    assert store.columns == ["series_id", "title"]
+    assert not list(outdir.glob("keywords.*"))
+    assert not (tmp_path / "t.cols.tmp").exists() and not (tmp_path / "t.cols.old").exists()
+    assert store.get(1) == {"series_id": 1, "title": "b"}
+
+def test_missing_list_null_file_raises(tmp_path):
+    store, _ = roundtrip(tmp_path, [{"series_id": 1, "genres": ["a"]}])
+    (store.dir / "genres.list_null.npy").unlink()
+
+    with pytest.raises(FileNotFoundError):
+        TitleStore(store.dir).column("genres")
+
+def test_llm_titles_roundtrip(tmp_path):
+    src = HERE.parent / "llme özel hali" / "llm_titles.jsonl"
+    if not src.exists():
+        pytest.skip("llm_titles.jsonl yok")
+
+    import_jsonl(src, tmp_path / "llm.cols")
+    export_jsonl(tmp_path / "llm.cols", tmp_path / "back.jsonl")
+
+    original = [json.loads(l) for l in src.read_text(encoding="utf-8").splitlines() if l.strip()]
+    back = [json.loads(l) for l in (tmp_path / "back.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert back == original
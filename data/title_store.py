@@ -0,0 +1,513 @@
+# title_store.py
+# Amaç: dizi kayıtlarını (titles_raw / titles_enriched / llm_titles) sütun bazlı
+# ikili formatta saklamak. Her okuyucu sadece ihtiyaç duyduğu sütunları mmap ile açar,
+# tek bir diziye series_id indeksi üzerinden binary search ile ulaşılır.
+#
+# Klasör yapısı (örn: titles_enriched.cols/):
+#   manifest.json                 -> satır sayısı + sütun tipleri
+#   series_id.sorted.npy          -> sıralı series_id'ler
+#   series_id.rows.npy            -> sıralı id'nin satır numarası
+#   <col>.npy                     -> int / float / bool sütunları
+#   <col>.null.npy                -> int sütunu için null maskesi
+#   <col>.offsets.npy + .data.bin -> string sütunu (utf-8 baytlar + offset'ler)
+#   <col>.list.npy                -> list sütunu: satır -> eleman offset'leri
+#                                    (elemanlar yine string sütunu gibi saklanır)
+#   <col>.list_null.npy           -> list sütunu için satır null maskesi (null ile [] ayrı)
+#
+# JSONL -> store -> JSONL dönüşümünde bilinçli normalizasyonlar:
+#   - bir kayıtta olmayan anahtar, o sütunun null'u olarak okunur ("key": null)
+#   - int ve float karışık sütun float saklanır (8 -> 8.0)
+#   - başka karışık tipli sütunlar (örn. int listesi) json string olarak saklanır, değer korunur
+#   - hata satırları atlanır, aynı series_id'nin son kaydı geçerlidir
+
+import os
+import json
+import shutil
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+
+# bool -1 = null
+BOOL_NULL = -1
+
+def oku_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    with Path(path).open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+def merge_jsonl_records(path, updates: Dict[Any, Dict[str, Any]]) -> Dict[Any, Dict[str, Any]]:
+    """
+    Compacting merge: güncellenen id'lerin kaydını dosyadaki yerinde değiştirir,
+    aynı id'nin tekrar eden satırlarını son yazılana indirir, bozuk satırları atlar.
+    Dosyada olmayan id'ler sona eklenir. Yazım tmp dosya + os.replace ile atomiktir.
+    Birleşmiş kayıtları (dosya sırasıyla) döner.
+    """
+    records = {}
+    if Path(path).exists():
+        for obj in oku_jsonl(path):
+            # dict ilk görülen sırayı korur, değer son satırla güncellenir
+            records[obj.get("series_id")] = obj
+
+    records.update(updates)
+
+    tmp_path = str(path) + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f_out:
+        for obj in records.values():
+            f_out.write(json.dumps(obj, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, path)
+    return records
+
+def is_title_store(path) -> bool:
+    p = Path(path)
+    return p.is_dir() and (p / MANIFEST).exists()
+
+def infer_kind(values: List[Any]) -> str:
+    """
+    Sütun tipini değerlerden çıkarır: int, float, bool, str, list veya json.
+    None her tipte null olarak kabul edilir. Karışık tipler json string olarak saklanır.
+    """
+    kinds = set()
+    for v in values:
+        if v is None:
+            continue
+        if isinstance(v, bool):
+            kinds.add("bool")
+        elif isinstance(v, int):
+            kinds.add("int")
+        elif isinstance(v, float):
+            kinds.add("float")
+        elif isinstance(v, str):
+            kinds.add("str")
+        elif isinstance(v, list) and all(isinstance(x, str) or x is None for x in v):
+            kinds.add("list")
+        else:
+            kinds.add("json")
+
+    if not kinds:
+        return "str"
+    if kinds == {"int", "float"}:
+        return "float"
+    if len(kinds) == 1:
+        return kinds.pop()
+    return "json"
+
+def _encode_strings(strings: List[Optional[str]]):
+    offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+    null = np.zeros(len(strings), dtype=bool)
+    chunks = []
+    pos = 0
+    for i, s in enumerate(strings):
+        if s is None:
+            null[i] = True
+        else:
+            b = s.encode("utf-8")
+            chunks.append(b)
+            pos += len(b)
+        offsets[i + 1] = pos
+    return offsets, null, b"".join(chunks)
+
+def _write_strings(outdir: Path, name: str, strings: List[Optional[str]]) -> None:
+    offsets, null, data = _encode_strings(strings)
+    np.save(outdir / f"{name}.offsets.npy", offsets)
+    np.save(outdir / f"{name}.null.npy", null)
+    (outdir / f"{name}.data.bin").write_bytes(data)
+
+def write_store(records: Iterable[Dict[str, Any]], outdir) -> Path:
+    """
+    Kayıtları sütun bazlı store olarak yazar. Aynı series_id birden fazla geçiyorsa
+    son kayıt geçerlidir; hata satırları ({"error": ...}) atlanır.
+    Eksik anahtarlar null olur, int/float karışık sütunlar float'a döner (modül başındaki nota bak).
+
+    Dosyalar önce yanındaki <outdir>.tmp klasörüne yazılır, sonra eski store ile yer
+    değiştirilir: yarıda kalan bir import eski store'u bozmaz, silinen/tipi değişen
+    sütunların eski dosyaları da kalmaz.
+    """
+    outdir = Path(outdir)
+    final_dir = outdir
+    outdir = final_dir.with_name(final_dir.name + ".tmp")
+    if outdir.exists():
+        shutil.rmtree(outdir)
+    outdir.mkdir(parents=True)
+
+    by_id = {}
+    for rec in records:
+        if rec.get("error") or not isinstance(rec.get("series_id"), int):
+            continue
+        by_id[rec["series_id"]] = rec
+    rows = list(by_id.values())
+
+    names = []
+    for rec in rows:
+        for k in rec:
+            if k not in names:
+                names.append(k)
+
+    columns = {}
+    for name in names:
+        values = [rec.get(name) for rec in rows]
+        kind = infer_kind(values)
+        columns[name] = kind
+
+        if kind == "int":
+            null = np.array([v is None for v in values], dtype=bool)
+            arr = np.array([0 if v is None else v for v in values], dtype=np.int64)
+            np.save(outdir / f"{name}.npy", arr)
+            np.save(outdir / f"{name}.null.npy", null)
+        elif kind == "float":
+            arr = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+            np.save(outdir / f"{name}.npy", arr)
+        elif kind == "bool":
+            arr = np.array([BOOL_NULL if v is None else int(v) for v in values], dtype=np.int8)
+            np.save(outdir / f"{name}.npy", arr)
+        elif kind == "str":
+            _write_strings(outdir, name, values)
+        elif kind == "list":
+            list_offsets = np.zeros(len(values) + 1, dtype=np.int64)
+            list_null = np.array([v is None for v in values], dtype=bool)
+            items = []
+            for i, v in enumerate(values):
+                items.extend(v or [])
+                list_offsets[i + 1] = len(items)
+            np.save(outdir / f"{name}.list.npy", list_offsets)
+            np.save(outdir / f"{name}.list_null.npy", list_null)
+            _write_strings(outdir, name, items)
+        else:
+            _write_strings(outdir, name, [None if v is None else json.dumps(v, ensure_ascii=False) for v in values])
+
+    # series_id indeksi: sıralı id + satır numarası -> np.searchsorted ile O(log N) erişim
+    ids = np.array([rec["series_id"] for rec in rows], dtype=np.int64)
+    order = np.argsort(ids, kind="stable")
+    np.save(outdir / "series_id.sorted.npy", ids[order])
+    np.save(outdir / "series_id.rows.npy", order.astype(np.int64))
+
+    manifest = {"version": FORMAT_VERSION, "rows": len(rows), "columns": columns}
+    with (outdir / MANIFEST).open("w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    # dolu bir klasör os.replace ile ezilemez: eskiyi kenara al, yenisini taşı, eskiyi sil
+    old_dir = final_dir.with_name(final_dir.name + ".old")
+    if old_dir.exists():
+        shutil.rmtree(old_dir)
+    if final_dir.exists():
+        os.replace(final_dir, old_dir)
+    os.replace(outdir, final_dir)
+    if old_dir.exists():
+        shutil.rmtree(old_dir)
+
+    return final_dir
+
+class StringColumn:
+    """Offset indeksli string sütunu. Baytlar mmap'ten okunur, sadece istenen satır decode edilir."""
+
+    def __init__(self, store_dir: Path, name: str):
+        self.offsets = np.load(store_dir / f"{name}.offsets.npy", mmap_mode="r")
+        self.null = np.load(store_dir / f"{name}.null.npy", mmap_mode="r")
+        data_path = store_dir / f"{name}.data.bin"
+        # boş dosya mmap edilemez
+        if data_path.stat().st_size:
+            self.data = np.memmap(data_path, dtype=np.uint8, mode="r")
+        else:
+            self.data = np.zeros(0, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.null)
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        if self.null[i]:
+            return None
+        return self.data[int(self.offsets[i]):int(self.offsets[i + 1])].tobytes().decode("utf-8")
+
+    def to_list(self) -> List[Optional[str]]:
+        """Tüm sütunu tek seferde decode eder (satır satır memmap indekslemekten çok daha hızlı)."""
+        # memoryview dilimleri kopya üretmez, decode doğrudan mmap sayfalarından yapılır
+        buf = memoryview(self.data)
+        offs = self.offsets.tolist()
+        null = self.null.tolist()
+        return [None if null[i] else str(buf[offs[i]:offs[i + 1]], "utf-8") for i in range(len(null))]
+
+class ListColumn:
+    """Liste sütunu: satır -> [başlangıç, bitiş) eleman aralığı, elemanlar StringColumn'da."""
+
+    def __init__(self, store_dir: Path, name: str):
+        self.list_offsets = np.load(store_dir / f"{name}.list.npy", mmap_mode="r")
+        self.null = np.load(store_dir / f"{name}.list_null.npy", mmap_mode="r")
+        self.items = StringColumn(store_dir, name)
+
+    def __len__(self) -> int:
+        return len(self.list_offsets) - 1
+
+    def __getitem__(self, i: int) -> Optional[List[Optional[str]]]:
+        if self.null[i]:
+            return None
+        return [self.items[j] for j in range(int(self.list_offsets[i]), int(self.list_offsets[i + 1]))]
+
+    def to_list(self) -> List[Optional[List[Optional[str]]]]:
+        items = self.items.to_list()
+        lo = self.list_offsets.tolist()
+        null = self.null.tolist()
+        return [None if null[i] else items[lo[i]:lo[i + 1]] for i in range(len(null))]
+
+class TitleStore:
+    """
+    Sütun bazlı dizi kayıtları. Sütunlar ilk erişimde mmap ile açılır;
+    kullanılmayan sütunlar hiç okunmaz.
+    """
+
+    def __init__(self, store_dir):
+        self.dir = Path(store_dir)
+        if not is_title_store(self.dir):
+            raise FileNotFoundError(f"Title store bulunamadı: {self.dir / MANIFEST}")
+
+        with (self.dir / MANIFEST).open("r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Desteklenmeyen store versiyonu: {manifest.get('version')}")
+
+        self.rows = manifest["rows"]
+        self.kinds = manifest["columns"]
+        self._cols = {}
+        self._nulls = {}
+        self._sorted_ids = None
+        self._id_rows = None
+
+    def __len__(self) -> int:
+        return self.rows
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.kinds)
+
+    def column(self, name: str):
+        """
+        Sayısal sütunlar için mmap'li np.ndarray (float: NaN=null, bool: -1=null),
+        string/list sütunları için satır bazlı erişilen kolon nesnesi döner.
+        """
+        if name in self._cols:
+            return self._cols[name]
+        kind = self.kinds.get(name)
+        if kind is None:
+            raise KeyError(f"Sütun yok: {name}")
+
+        if kind in ("int", "float", "bool"):
+            col = np.load(self.dir / f"{name}.npy", mmap_mode="r")
+        elif kind == "list":
+            col = ListColumn(self.dir, name)
+        else:
+            col = StringColumn(self.dir, name)
+
+        self._cols[name] = col
+        return col
+
+    def null_mask(self, name: str) -> np.ndarray:
+        if name in self._nulls:
+            return self._nulls[name]
+        kind = self.kinds[name]
+        if kind == "float":
+            mask = np.isnan(self.column(name))
+        elif kind == "bool":
+            mask = self.column(name) == BOOL_NULL
+        elif kind == "list":
+            mask = self.column(name).null
+        else:
+            mask = np.load(self.dir / f"{name}.null.npy", mmap_mode="r")
+        self._nulls[name] = mask
+        return mask
+
+    def value(self, name: str, i: int):
+        """Tek hücre (random access)."""
+        kind = self.kinds[name]
+        col = self.column(name)
+        if kind in ("int", "float", "bool"):
+            return None if self.null_mask(name)[i] else col[i].item() if kind != "bool" else bool(col[i])
+        if kind == "json":
+            s = col[i]
+            return None if s is None else json.loads(s)
+        return col[i]
+
+    def values(self, name: str) -> list:
+        """Tüm sütunu Python değerleri olarak döner (null -> None)."""
+        kind = self.kinds[name]
+        col = self.column(name)
+        if kind in ("int", "float", "bool"):
+            null = self.null_mask(name).tolist()
+            vals = col.tolist() if kind != "bool" else col.astype(bool).tolist()
+            return [None if n else v for v, n in zip(vals, null)]
+        vals = col.to_list()
+        if kind == "json":
+            return [None if s is None else json.loads(s) for s in vals]
+        return vals
+
+    def float_column(self, name: str) -> np.ndarray:
+        """int/float sütununu float64 dizisi olarak döner, null -> NaN."""
+        if self.kinds.get(name) not in ("int", "float"):
+            raise KeyError(f"Sayısal sütun değil: {name}")
+        return np.where(self.null_mask(name), np.nan, self.column(name)).astype(np.float64)
+
+    def _load_index(self) -> None:
+        if self._sorted_ids is None:
+            self._sorted_ids = np.load(self.dir / "series_id.sorted.npy", mmap_mode="r")
+            self._id_rows = np.load(self.dir / "series_id.rows.npy", mmap_mode="r")
+
+    def rows_of(self, series_ids) -> np.ndarray:
+        """Vektörel row_of: her series_id için satır numarası, store'da yoksa -1."""
+        self._load_index()
+        ids = np.asarray(series_ids, dtype=np.int64)
+        if len(self._sorted_ids) == 0:
+            return np.full(ids.shape, -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self._sorted_ids, ids), len(self._sorted_ids) - 1)
+        found = self._sorted_ids[pos] == ids
+        return np.where(found, self._id_rows[pos], -1).astype(np.int64)
+
+    def row_of(self, series_id: int) -> Optional[int]:
+        """series_id -> satır numarası (binary search), yoksa None."""
+        self._load_index()
+        pos = int(np.searchsorted(self._sorted_ids, series_id))
+        if pos < len(self._sorted_ids) and self._sorted_ids[pos] == series_id:
+            return int(self._id_rows[pos])
+        return None
+
+    def record(self, i: int, columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        return {name: self.value(name, i) for name in (columns or self.columns) if name in self.kinds}
+
+    def get(self, series_id: int, columns: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        i = self.row_of(series_id)
+        return None if i is None else self.record(i, columns)
+
+    def iter_records(self, columns: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        names = [c for c in (columns or self.columns) if c in self.kinds]
+        cols = [self.values(c) for c in names]
+        for row in zip(*cols):
+            yield dict(zip(names, row))
+
+def import_jsonl(jsonl_path, store_dir) -> Path:
+    return write_store(oku_jsonl(Path(jsonl_path)), store_dir)
+
+def export_jsonl(store_dir, jsonl_path) -> int:
+    store = TitleStore(store_dir)
+    n = 0
+    with Path(jsonl_path).open("w", encoding="utf-8") as f:
+        for rec in store.iter_records():
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            n += 1
+    return n
+
+def iter_title_records(path, columns: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+    """Yol bir title store ise sadece istenen sütunları okur, değilse JSONL'den okur (geriye uyumluluk)."""
+    if is_title_store(path):
+        return TitleStore(path).iter_records(columns)
+    return oku_jsonl(Path(path))
+
+def _measure(fn, repeat: int = 5):
+    # süre tracemalloc kapalıyken ölçülür (tracemalloc her allocation'ı yavaşlatır)
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+
+    # tepe bellek: Python heap'i; mmap sayfaları dahil değil (zaten kopyalanmıyorlar)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak
+
+def bench(jsonl_path, store_dir, columns: List[str], lookup_ids: List[int]) -> None:
+    """JSONL okuyucuları ile store'u aynı iş için karşılaştırır: süre ve tepe bellek."""
+    def jsonl_columns():
+        return [[rec.get(c) for c in columns] for rec in oku_jsonl(Path(jsonl_path))]
+
+    def store_columns():
+        return [[rec[c] for c in columns] for rec in TitleStore(store_dir).iter_records(columns)]
+
+    def jsonl_lookup():
+        wanted = set(lookup_ids)
+        found = {}
+        for rec in oku_jsonl(Path(jsonl_path)):
+            sid = rec.get("series_id")
+            if sid in wanted:
+                found[sid] = [rec.get(c) for c in columns]
+                if len(found) == len(wanted):
+                    break
+        return [found.get(sid) for sid in lookup_ids]
+
+    def store_lookup():
+        store = TitleStore(store_dir)
+        out = []
+        for sid in lookup_ids:
+            rec = store.get(sid, columns)
+            out.append(None if rec is None else [rec[c] for c in columns])
+        return out
+
+    def jsonl_arrays():
+        recs = [[rec.get(c) for c in columns] for rec in oku_jsonl(Path(jsonl_path))]
+        return [np.array([np.nan if r[j] is None else r[j] for r in recs], dtype=np.float64) for j in range(len(columns))]
+
+    def store_arrays():
+        # sayısal sütun doğrudan mmap'li ndarray; burada sadece float64'e çevrilir
+        store = TitleStore(store_dir)
+        return [np.where(store.null_mask(c), np.nan, store.column(c)).astype(np.float64) for c in columns]
+
+    cases = [("read columns " + ",".join(columns), jsonl_columns, store_columns)]
+    if all(TitleStore(store_dir).kinds.get(c) in ("int", "float") for c in columns):
+        cases.append(("numeric arrays " + ",".join(columns), jsonl_arrays, store_arrays))
+    if lookup_ids:
+        cases.append((f"lookup {len(lookup_ids)} series_id", jsonl_lookup, store_lookup))
+
+    for label, fn_jsonl, fn_store in cases:
+        r1, t1, m1 = _measure(fn_jsonl)
+        r2, t2, m2 = _measure(fn_store)
+        same = all(np.array_equal(a, b, equal_nan=True) for a, b in zip(r1, r2)) if "numeric" in label else r1 == r2
+        if not same:
+            raise SystemExit(f"{label}: JSONL ve store sonuçları farklı")
+        print(label)
+        print(f"  jsonl: {t1 * 1000:8.2f} ms | peak {m1 / 1024:9.1f} KiB")
+        print(f"  store: {t2 * 1000:8.2f} ms | peak {m2 / 1024:9.1f} KiB")
+        print(f"  speedup x{t1 / max(t2, 1e-9):.1f} | memory x{m1 / max(m2, 1):.1f}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_imp = sub.add_parser("import", help="JSONL -> title store")
+    p_imp.add_argument("infile")
+    p_imp.add_argument("outdir")
+
+    p_exp = sub.add_parser("export", help="title store -> JSONL")
+    p_exp.add_argument("store")
+    p_exp.add_argument("outfile")
+
+    p_bench = sub.add_parser("bench", help="JSONL vs title store parse süresi ve bellek")
+    p_bench.add_argument("infile")
+    p_bench.add_argument("store")
+    p_bench.add_argument("--columns", default="series_id,title,doc_text")
+    p_bench.add_argument("--lookup", default="", help="Comma separated series_ids for random access test")
+    args = parser.parse_args()
+
+    if args.cmd == "import":
+        outdir = import_jsonl(args.infile, args.outdir)
+        print(f"Rows: {len(TitleStore(outdir))}")
+        print(f"Saved: {outdir}")
+    elif args.cmd == "export":
+        n = export_jsonl(args.store, args.outfile)
+        print(f"Output lines written: {n}")
+        print(f"Saved: {args.outfile}")
+    else:
+        lookup_ids = [int(x) for x in args.lookup.split(",") if x.strip()]
+        bench(args.infile, args.store, args.columns.split(","), lookup_ids)
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,16 @@
 import json
 import numpy as np
 from tqdm import tqdm
-from sentence_transformers import SentenceTransformer
 import argparse
+import sys
 from pathlib import Path #gerekli kütüphaneler
 
+sys.path.append(str(Path(__file__).resolve().parents[1] / "data"))
+from title_store import TitleStore, is_title_store, iter_title_records, oku_jsonl
 
-def oku_jsonl(path:Path):
-  with path.open("r",encoding="utf-8") as f:
-    for line in f:
-      line = line.strip()
-      if not line:
-        continue
-      yield json.loads(line)
-      #jsonl okuma yaprız satır satır.
+
+#infile jsonl de olabilir title store klasörü de; store ise sadece bu sütunlar okunur
+EMBED_COLUMNS = ["series_id", "title", "original_title", "doc_text"]
 
 
 
@@ -27,7 +24,7 @@ def text_ve_meta_yükle(jsonl_path:Path):
   texts = []
   meta = []
 
-  for rec in oku_jsonl(jsonl_path):
+  for rec in iter_title_records(jsonl_path, EMBED_COLUMNS):
     doc_text= (rec.get("doc_text") or "").strip()
     if not doc_text:
       continue
@@ -44,10 +41,79 @@ def text_ve_meta_yükle(jsonl_path:Path):
 
 
 
+#prior'lar: sadece cosine ile sıralayınca 50 oylu bilinmeyen diziler üstte çıkıyor
+#bu yüzden her dizi için normalize edilmiş kalite/popülerlik skorlarını embedding'in yanına kaydederiz
+#recommend.py bunları sorgu anında ağırlıklarla top-k'dan önce aynı skorlama adımında ekler
+PRIOR_STATS = ["vote_average", "vote_count", "popularity"]
+PRIOR_NAMES = ["rating_bayes", "log_popularity"]
+
+def prior_stats_yükle(jsonl_path:Path, meta:list):
+  #meta sırasıyla hizalı {vote_average, vote_count, popularity} float64 dizileri, eksik/null -> NaN
+  ids = np.array([m.get("series_id") if isinstance(m.get("series_id"), int) else -1 for m in meta], dtype=np.int64)
+
+  if is_title_store(jsonl_path):
+    #store: sütunlar mmap'ten okunur, sıralı series_id indeksi ile meta'ya hizalanır
+    store = TitleStore(jsonl_path)
+    rows = store.rows_of(ids)
+    found = rows >= 0
+    stats = {}
+    for name in PRIOR_STATS:
+      out = np.full(len(meta), np.nan)
+      if name in store.kinds:
+        out[found] = store.float_column(name)[rows[found]]
+      stats[name] = out
+    return stats
+
+  by_id = {}
+  for rec in oku_jsonl(jsonl_path):
+    by_id[rec.get("series_id")] = rec
+  recs = [by_id.get(sid) or {} for sid in ids.tolist()]
+  return {name: np.array([np.nan if r.get(name) is None else r[name] for r in recs], dtype=np.float64)
+          for name in PRIOR_STATS}
+
+def positive_float(x:str):
+  v = float(x)
+  if v <= 0:
+    raise argparse.ArgumentTypeError(f"pozitif olmalı: {x}")
+  return v
+
+def minmax(x:np.ndarray):
+  lo, hi = float(x.min()), float(x.max())
+  if hi - lo < 1e-12:
+    return np.zeros_like(x)
+  return (x - lo) / (hi - lo)
+
+def build_priors(stats:dict, min_votes=None):
+  #prior_stats_yükle çıktısından (meta sırasıyla hizalı) (N, 2) float32 matris + parametreler
+  #rating_bayes: (v*R + m*C) / (v + m) -> az oylu dizilerin puanı ortalamaya (C) çekilir
+  #log_popularity: log(1 + popularity)
+  #ikisi de korpus üzerinde [0, 1] aralığına normalize edilir
+  R = np.asarray(stats["vote_average"], dtype=np.float64)
+  v = np.nan_to_num(np.asarray(stats["vote_count"], dtype=np.float64), nan=0.0)
+  pop = np.nan_to_num(np.asarray(stats["popularity"], dtype=np.float64), nan=0.0)
+
+  if min_votes is not None and min_votes <= 0:
+    #m = 0 iken oysuz dizide (v*R + m*C) / (v + m) = 0/0 -> NaN
+    raise ValueError(f"min_votes pozitif olmalı: {min_votes}")
+
+  rated = (v > 0) & ~np.isnan(R)
+  C = float(R[rated].mean()) if rated.any() else 0.0
+  m = float(min_votes) if min_votes is not None else (float(np.median(v[rated])) if rated.any() else 1.0)
+  R = np.where(rated, R, C)
+
+  rating_bayes = (v * R + m * C) / (v + m)
+  log_popularity = np.log1p(np.maximum(pop, 0.0))
+
+  priors = np.stack([minmax(rating_bayes), minmax(log_popularity)], axis=1).astype(np.float32)
+  info = {"names": PRIOR_NAMES, "C": C, "m": m}
+  return priors, info
+
 #embedding üretme yaparız metin. cosine similarity'de kullanılır(kosinüs benzerliği)
 #metin listesini embedding matrisi ile sayısal vektörlere çeviririz. Karşılaştırma için
 
 def build_embeddings(text,model_name:str, batch_size:int):
+  #model sadece gerektiğinde yüklenir; prior/store yardımcıları onsuz da kullanılabilir
+  from sentence_transformers import SentenceTransformer
   model = SentenceTransformer(model_name)
   embeddings = model.encode(
       text, # Corrected: Changed 'texts' to 'text'
@@ -63,10 +129,10 @@ def build_embeddings(text,model_name:str, batch_size:int):
 # embedding.npy hızlı yüklenir daha az yer kaplar
 #meta.json: bu embedding hangi diziye aitti sorunun cevabını verir
 
-def save_outputs(embeddings: np.ndarray, meta:list, output_path:Path):
+def save_outputs(embeddings: np.ndarray, meta:list, output_path:Path, priors=None, prior_info=None):
   output_path.mkdir(parents=True, exist_ok=True)
 
-  emb_path = output_path / "embedding.npy"
+  emb_path = output_path / "embeddings.npy" # recommend.py bu ismi bekler
   meta_path = output_path / "meta.json"
 
   np.save(emb_path, embeddings)
@@ -78,23 +144,89 @@ def save_outputs(embeddings: np.ndarray, meta:list, output_path:Path):
   print("saved:", meta_path)
   print("embedding shape", embeddings.shape)
 
+  if priors is not None:
+    save_priors(priors, prior_info, output_path)
+
+#priors.npy: meta ile aynı satır sırası, priors.json: sütun isimleri + smoothing parametreleri
+def save_priors(priors: np.ndarray, prior_info:dict, output_path:Path):
+  #NaN/inf bir prior blend skorunu bozar, top-k sırası anlamsızlaşır
+  if not np.isfinite(priors).all():
+    raise ValueError("priors NaN/inf içeriyor, kaydedilmedi.")
+  np.save(output_path / "priors.npy", priors)
+  with (output_path / "priors.json").open("w",encoding="utf-8") as f:
+    json.dump(prior_info, f, ensure_ascii=False, indent=2)
+  print("saved:", output_path / "priors.npy", priors.shape)
+
+#artımlı güncelleme: sadece değişen dizilerin embedding satırlarını yeniden üretiriz
+#mevcut satırı yerinde değiştiririz, yeni diziyi sona ekleriz, diğerleri aynen kalır
+def update_only_ids(jsonl_path:Path, output_path:Path, only_ids:set, model_name:str, batch_size:int, min_votes=None):
+  texts, meta = text_ve_meta_yükle(jsonl_path)
+  pairs = [(t, m) for t, m in zip(texts, meta) if m["series_id"] in only_ids]
+  if not pairs:
+    print("Nothing to update")
+    return
+
+  embeddings = np.load(output_path / "embeddings.npy")
+  with (output_path / "meta.json").open("r",encoding="utf-8") as f:
+    old_meta = json.load(f)
+
+  new_emb = build_embeddings([t for t, _ in pairs], model_name, batch_size)
+
+  row_of = {m.get("series_id"): i for i, m in enumerate(old_meta)}
+  append_rows = []
+  for (_, m), vec in zip(pairs, new_emb):
+    i = row_of.get(m["series_id"])
+    if i is None:
+      append_rows.append(vec)
+      old_meta.append(m)
+    else:
+      embeddings[i] = vec
+      old_meta[i] = m
+
+  if append_rows:
+    embeddings = np.vstack([embeddings, np.stack(append_rows)]).astype(np.float32)
+
+  #korpus istatistikleri (C, m, min/max) değişmiş olabilir, prior'lar tüm satırlar için yeniden hesaplanır
+  priors, prior_info = build_priors(prior_stats_yükle(jsonl_path, old_meta), min_votes)
+
+  print(f"Updated rows: {len(pairs) - len(append_rows)} | appended: {len(append_rows)}")
+  save_outputs(embeddings, old_meta, output_path, priors, prior_info)
+
 #main bloğu dosyalr nerede model hangisibatch kaç kontrolü
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("--infile", default="llme özel hali/llm_titles.jsonl", help="Input JSONL path")#dosya seçme
+    parser.add_argument("--infile", default="llme özel hali/llm_titles.jsonl", help="Input JSONL path or title store dir")#dosya seçme
     parser.add_argument("--outdir", default="vector_store", help="Output folder (embeddings + meta)")
     parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2", help="Embedding model")#embedding modelimiz
     parser.add_argument("--batch_size", type=int, default=64, help="Encoding batch size") #embedding ayaları
-    args = parser.parse_args(args=[]) # Fix: Pass an empty list to parse_args()
+    parser.add_argument("--only_ids", default=None, help="changed_ids.json: sadece bu dizileri güncelle")
+    parser.add_argument("--min_votes", type=positive_float, default=None, help="Bayes smoothing m (varsayılan: vote_count medyanı)")
+    parser.add_argument("--priors_only", action="store_true", help="Model çalıştırmadan mevcut store için sadece priors.npy üret")
+    # yanlış yazılmış bir bayrak (örn: --only-ids) sessizce tam yeniden encode'a düşmesin
+    args = parser.parse_args()
 
     infile = Path(args.infile)
     outdir = Path(args.outdir)
 
+    if args.only_ids:
+        with open(args.only_ids, "r", encoding="utf-8") as f:
+            only_ids = set(json.load(f))
+        update_only_ids(infile, outdir, only_ids, args.model, args.batch_size, args.min_votes)
+        return
+
+    if args.priors_only:
+        with (outdir / "meta.json").open("r",encoding="utf-8") as f:
+            meta = json.load(f)
+        priors, prior_info = build_priors(prior_stats_yükle(infile, meta), args.min_votes)
+        save_priors(priors, prior_info, outdir)
+        return
+
     texts, meta = text_ve_meta_yükle(infile) # Corrected function name
     print(f"Loaded texts: {len(texts)}")
 
     embeddings = build_embeddings(texts, args.model, args.batch_size)
-    save_outputs(embeddings, meta, outdir)
+    priors, prior_info = build_priors(prior_stats_yükle(infile, meta), args.min_votes)
+    save_outputs(embeddings, meta, outdir, priors, prior_info)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,77 @@
+# build_embeddings.py prior hesabı (rating_bayes, log_popularity).
+# Çalıştırma: python -m pytest -q embedding
+
+import json
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+HERE = Path(__file__).resolve().parent
+
+spec = importlib.util.spec_from_file_location("build_embeddings", HERE / "build_embeddings.py")
+be = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(be)
+# build_embeddings data/ klasörünü sys.path'e ekler
+from title_store import import_jsonl
+
+def stats(vote_average, vote_count, popularity):
+    return {
+        "vote_average": np.array(vote_average, dtype=np.float64),
+        "vote_count": np.array(vote_count, dtype=np.float64),
+        "popularity": np.array(popularity, dtype=np.float64),
+    }
+
+def test_build_priors_with_unrated_rows():
+    # 2. satır hiç oylanmamış, 3. satırın oy sayısı/popülerliği null
+    s = stats([8.0, np.nan, 6.0, 9.0], [100, 0, np.nan, 10], [50.0, np.nan, 5.0, 0.0])
+
+    priors, info = be.build_priors(s, min_votes=10)
+
+    assert priors.shape == (4, 2) and priors.dtype == np.float32
+    assert np.isfinite(priors).all()
+    assert info["names"] == be.PRIOR_NAMES
+    # C sadece oylanmış satırların ortalaması
+    assert info["C"] == pytest.approx(8.5)
+    assert info["m"] == 10
+
+    bayes = np.array([(100 * 8 + 10 * 8.5) / 110, 8.5, 8.5, (10 * 9 + 10 * 8.5) / 20])
+    expected = (bayes - bayes.min()) / (bayes.max() - bayes.min())
+    np.testing.assert_allclose(priors[:, 0], expected, rtol=1e-6)
+    # oysuz satırlar ortalamaya (C) çekilir
+    assert priors[1, 0] == priors[2, 0]
+
+    log_pop = np.log1p([50.0, 0.0, 5.0, 0.0])
+    np.testing.assert_allclose(priors[:, 1], log_pop / log_pop.max(), rtol=1e-6)
+
+def test_build_priors_default_min_votes_is_median():
+    s = stats([7.0, 8.0, 9.0, np.nan], [10, 30, 50, 0], [1.0, 2.0, 3.0, 4.0])
+
+    _, info = be.build_priors(s)
+
+    assert info["m"] == 30
+
+@pytest.mark.parametrize("min_votes", [0, -5])
+def test_build_priors_rejects_non_positive_min_votes(min_votes):
+    with pytest.raises(ValueError):
+        be.build_priors(stats([8.0], [10], [1.0]), min_votes=min_votes)
+
+def test_prior_stats_store_matches_jsonl(tmp_path):
+    records = [
+        {"series_id": 3, "vote_average": 7.5, "vote_count": 20, "popularity": 4.0},
+        {"series_id": 1, "vote_average": None, "vote_count": 0, "popularity": None},
+    ]
+    jsonl = tmp_path / "titles.jsonl"
+    jsonl.write_text("".join(json.dumps(r) + "\n" for r in records), encoding="utf-8")
+    store = import_jsonl(jsonl, tmp_path / "titles.cols")
+    # meta sırası dosya sırasından farklı, 99 hiçbir kaynakta yok
+    meta = [{"series_id": 1}, {"series_id": 99}, {"series_id": 3}]
+
+    from_jsonl = be.prior_stats_yükle(jsonl, meta)
+    from_store = be.prior_stats_yükle(store, meta)
+
+    np.testing.assert_array_equal(from_jsonl["vote_count"], [0, np.nan, 20])
+    np.testing.assert_array_equal(from_jsonl["vote_average"], [np.nan, np.nan, 7.5])
+    for name in be.PRIOR_STATS:
+        np.testing.assert_array_equal(from_store[name], from_jsonl[name])
@@ -1,8 +1,22 @@
 # Amaç: Dosyayı llm modeline uygun jsonl yapısına getirmek. 
 # Her satır = 1 diziyi temsil eder. + dizinin dağınık bilgilerini tek anlamlı bilgiye getiririz->doc_text" (embeddingee girecek metin)
 
+import sys
 import json
 import argparse
+from pathlib import Path
+
+# ortak sütun bazlı store modülü data/ altında
+sys.path.append(str(Path(__file__).resolve().parents[1] / "data"))
+from title_store import iter_title_records, merge_jsonl_records, write_store
+
+# to_llm_record'un okuduğu alanlar: infile bir title store ise sadece bu sütunlar açılır
+LLM_INPUT_COLUMNS = [
+    "series_id", "title", "overview", "genres", "keywords", "cast_top", "creators",
+    "year", "seasons_count", "episodes_count", "runtime_avg_minutes",
+    "vote_average", "vote_count", "popularity", "original_language", "origin_country",
+    "poster_url_w500", "backdrop_url_w780",
+]
 
 def clean_list(x):
     """None/boşları temizler, string listesine çevir."""
@@ -72,64 +86,103 @@ def build_doc_text(rec: dict) -> str:
 
     return "\n".join(parts).strip()
 
+def to_llm_record(rec: dict):
+    """Zenginleştirilmiş kaydı llm_titles satırına çevirir, geçersizse None döner."""
+    # enrich script hata satırı yazmış olabilir: {"series_id":..., "error": "..."}
+    if rec.get("error"):
+        return None
+
+    series_id = rec.get("series_id")
+    if not isinstance(series_id, int):
+        return None
+
+    # İstenen JSONL yapısı: her satır 1 dizi + doc_text
+    out = {
+        "series_id": series_id,
+        "title": rec.get("title"),
+        "overview": rec.get("overview"),
+        "genres": clean_list(rec.get("genres")),
+        "keywords": clean_list(rec.get("keywords")),
+        "cast_top": clean_list(rec.get("cast_top")),
+        "creators": clean_list(rec.get("creators")),
+        "year": rec.get("year"),
+        "seasons_count": rec.get("seasons_count"),
+        "episodes_count": rec.get("episodes_count"),
+        "runtime_avg_minutes": rec.get("runtime_avg_minutes"),
+        "vote_average": rec.get("vote_average"),
+        "vote_count": rec.get("vote_count"),
+        "popularity": rec.get("popularity"),
+        "original_language": rec.get("original_language"),
+        "origin_country": rec.get("origin_country") or [],
+        "poster_url_w500": rec.get("poster_url_w500"),
+        "backdrop_url_w780": rec.get("backdrop_url_w780"),
+    }
+
+    out["doc_text"] = build_doc_text(out)
+    return out
+
+def update_only_ids(infile: str, outfile: str, only_ids: set):
+    """
+    Artımlı mod: sadece only_ids içindeki dizilerin doc_text'ini yeniden üretir
+    ve mevcut outfile'daki satırlarını yerinde değiştirir (yeni id'ler sona eklenir).
+    """
+    updates = {}
+    for rec in iter_title_records(infile, LLM_INPUT_COLUMNS):
+        if rec.get("series_id") not in only_ids:
+            continue
+        out = to_llm_record(rec)
+        if out is not None:
+            updates[out["series_id"]] = out
+
+    records = merge_jsonl_records(outfile, updates)
+
+    print(f"Updated records: {len(updates)} / requested: {len(only_ids)}")
+    print(f"Saved: {outfile}")
+    return records
+
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("--infile", default="zenginleştirilmiş llm/titles_enriched.jsonl")
+    parser.add_argument("--infile", default="zenginleştirilmiş llm/titles_enriched.jsonl", help="JSONL veya title store klasörü")
     parser.add_argument("--outfile", default="llm_titles.jsonl")
+    parser.add_argument("--outstore", default=None, help="Çıktıyı ayrıca title store olarak yaz (örn: llm_titles.cols)")
+    parser.add_argument("--only_ids", default=None, help="changed_ids.json: sadece bu id'leri güncelle")
     args = parser.parse_args()
 
+    if args.only_ids:
+        with open(args.only_ids, "r", encoding="utf-8") as f:
+            only_ids = set(json.load(f))
+        records = update_only_ids(args.infile, args.outfile, only_ids)
+        # store JSONL ile aynı kalsın: birleşmiş kayıtlardan baştan yazılır
+        if args.outstore:
+            write_store(records.values(), args.outstore)
+            print(f"Saved: {args.outstore}")
+        return
+
     n_in = 0
     n_out = 0
+    written = []
 
-    with open(args.infile, "r", encoding="utf-8") as f_in, \
-         open(args.outfile, "w", encoding="utf-8") as f_out:
-
-        for line in f_in:
-            line = line.strip()
-            if not line:
-                continue
+    with open(args.outfile, "w", encoding="utf-8") as f_out:
 
+        for rec in iter_title_records(args.infile, LLM_INPUT_COLUMNS):
             n_in += 1
-            rec = json.loads(line)
 
-            # enrich script hata satırı yazmış olabilir: {"series_id":..., "error": "..."}
-            if rec.get("error"):
+            out = to_llm_record(rec)
+            if out is None:
                 continue
 
-            series_id = rec.get("series_id")
-            if not isinstance(series_id, int):
-                continue
-
-            # İstenen JSONL yapısı: her satır 1 dizi + doc_text
-            out = {
-                "series_id": series_id,
-                "title": rec.get("title"),
-                "overview": rec.get("overview"),
-                "genres": clean_list(rec.get("genres")),
-                "keywords": clean_list(rec.get("keywords")),
-                "cast_top": clean_list(rec.get("cast_top")),
-                "creators": clean_list(rec.get("creators")),
-                "year": rec.get("year"),
-                "seasons_count": rec.get("seasons_count"),
-                "episodes_count": rec.get("episodes_count"),
-                "runtime_avg_minutes": rec.get("runtime_avg_minutes"),
-                "vote_average": rec.get("vote_average"),
-                "vote_count": rec.get("vote_count"),
-                "popularity": rec.get("popularity"),
-                "original_language": rec.get("original_language"),
-                "origin_country": rec.get("origin_country") or [],
-                "poster_url_w500": rec.get("poster_url_w500"),
-                "backdrop_url_w780": rec.get("backdrop_url_w780"),
-            }
-
-            out["doc_text"] = build_doc_text(out)
-
             f_out.write(json.dumps(out, ensure_ascii=False) + "\n")
             n_out += 1
+            if args.outstore:
+                written.append(out)
 
     print(f"Input lines read: {n_in}")
     print(f"Output lines written: {n_out}")
     print(f"Saved: {args.outfile}")
 
+    if args.outstore:
+        write_store(written, args.outstore)
+        print(f"Saved: {args.outstore}")
+
 if __name__ == "__main__":
     main()
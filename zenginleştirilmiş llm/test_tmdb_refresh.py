@@ -0,0 +1,180 @@
+# tmdb_enrich_tv.py --refresh akışının yerel stub'a (tmdb_stub_server.py) karşı testi.
+# Çalıştırma: python -m pytest -q "zenginleştirilmiş llm"
+
+import json
+import argparse
+import importlib.util
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+HERE = Path(__file__).resolve().parent
+
+def load_module(name: str, filename: str):
+    # klasör adında boşluk var, paket olarak import edilemiyor
+    spec = importlib.util.spec_from_file_location(name, HERE / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+enrich = load_module("tmdb_enrich_tv", "tmdb_enrich_tv.py")
+stub = load_module("tmdb_stub_server", "tmdb_stub_server.py")
+
+TODAY = enrich.utc_today()
+
+def days_ago(n: int) -> str:
+    return (TODAY - timedelta(days=n)).isoformat()
+
+def write_jsonl(path: Path, rows):
+    path.write_text("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows), encoding="utf-8")
+
+def read_jsonl(path: Path):
+    return [json.loads(l) for l in path.read_text(encoding="utf-8").splitlines() if l.strip()]
+
+@pytest.fixture
+def tmdb_stub(monkeypatch):
+    servers = []
+
+    def start(fixture, page_size=2):
+        server, state, base_url = stub.start_stub(fixture, page_size)
+        servers.append(server)
+        monkeypatch.setenv("TMDB_API_BASE", base_url)
+        monkeypatch.setenv("TMDB_API_KEY", "test")
+        monkeypatch.delenv("TMDB_BEARER", raising=False)
+        return state
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+def refresh_args(tmp_path: Path, since=None):
+    return argparse.Namespace(
+        infile=str(tmp_path / "titles_raw.jsonl"),
+        outfile=str(tmp_path / "titles_enriched.jsonl"),
+        watermark=str(tmp_path / "watermark.json"),
+        changed_out=str(tmp_path / "changed_ids.json"),
+        since=since,
+        language="tr-TR",
+        include_credits=False,
+        sleep=0,
+    )
+
+def test_fetch_changed_ids_windows_and_pages(tmdb_stub):
+    state = tmdb_stub({
+        "changes": [
+            {"id": 1, "date": days_ago(20)},
+            {"id": 2, "date": days_ago(20)},
+            {"id": 3, "date": days_ago(19)},
+            {"id": 4, "date": days_ago(3)},
+            {"id": 1, "date": days_ago(2)},
+        ],
+    }, page_size=2)
+
+    changed = enrich.fetch_changed_ids(TODAY - timedelta(days=20), TODAY, sleep=0)
+
+    assert changed == {1, 2, 3, 4}
+    calls = [q for path, q in state.requests if path == "/tv/changes"]
+    windows = sorted({(q["start_date"], q["end_date"]) for q in calls})
+    # 21 gün -> 14 + 7 günlük iki pencere
+    assert windows == [(days_ago(20), days_ago(7)), (days_ago(6), TODAY.isoformat())]
+    # ilk pencerede 3 id, sayfa boyutu 2 -> 2 sayfa
+    first = [q["page"] for q in calls if q["start_date"] == days_ago(20)]
+    assert first == ["1", "2"]
+
+def test_merge_jsonl_records_compacts_last_wins(tmp_path):
+    path = tmp_path / "titles_enriched.jsonl"
+    write_jsonl(path, [
+        {"series_id": 1, "title": "old1"},
+        {"series_id": 2, "error": "boom"},
+        {"series_id": 3, "title": "old3"},
+        {"series_id": 2, "title": "resumed2"},
+    ])
+    # yarım kalmış yazımdan kalan bozuk satır atlanmalı
+    with path.open("a", encoding="utf-8") as f:
+        f.write("{bozuk satır\n")
+
+    enrich.merge_jsonl_records(str(path), {3: {"series_id": 3, "title": "new3"}, 9: {"series_id": 9, "title": "new9"}})
+
+    assert read_jsonl(path) == [
+        {"series_id": 1, "title": "old1"},
+        {"series_id": 2, "title": "resumed2"},
+        {"series_id": 3, "title": "new3"},
+        {"series_id": 9, "title": "new9"},
+    ]
+    assert not Path(str(path) + ".tmp").exists()
+
+def test_refresh_against_stub(tmdb_stub, tmp_path):
+    write_jsonl(tmp_path / "titles_raw.jsonl", [{"series_id": i} for i in (1, 2, 3)])
+    write_jsonl(tmp_path / "titles_enriched.jsonl", [
+        {"series_id": 1, "title": "old1"},
+        {"series_id": 2, "title": "old2"},
+        {"series_id": 3, "title": "old3"},
+    ])
+    tmdb_stub({
+        # 99 katalogda yok, atlanmalı; 2 geçici hata (400), 3 silinmiş (404)
+        "changes": [{"id": i, "date": days_ago(1)} for i in (1, 2, 3, 99)],
+        "details": {"1": {"name": "new1", "first_air_date": "2020-05-01", "vote_count": 10}},
+        "keywords": {"1": ["heist"]},
+        "errors": {"2": 400},
+    })
+
+    enrich.refresh(refresh_args(tmp_path, since=days_ago(2)))
+
+    rows = {r["series_id"]: r for r in read_jsonl(tmp_path / "titles_enriched.jsonl")}
+    assert list(rows) == [1, 2, 3]
+    assert rows[1]["title"] == "new1" and rows[1]["keywords"] == ["heist"] and rows[1]["year"] == "2020"
+    # başarısız id'nin eski kaydı korunur
+    assert rows[2] == {"series_id": 2, "title": "old2"}
+    assert rows[3] == {"series_id": 3, "title": "old3"}
+
+    assert json.loads((tmp_path / "changed_ids.json").read_text()) == [1]
+    # 404 olan 3 pending'e girmez, 400 olan 2 bir deneme ile bekler
+    assert json.loads((tmp_path / "watermark.json").read_text()) == {"last_refresh": TODAY.isoformat(), "pending": {"2": 1}}
+
+def test_refresh_retries_pending_ids(tmdb_stub, tmp_path):
+    write_jsonl(tmp_path / "titles_raw.jsonl", [{"series_id": 2}])
+    write_jsonl(tmp_path / "titles_enriched.jsonl", [{"series_id": 2, "title": "old2"}])
+    (tmp_path / "watermark.json").write_text(json.dumps({"last_refresh": TODAY.isoformat(), "pending": {"2": 1}}))
+    # akış boş: 2 sadece pending listesinden gelir
+    tmdb_stub({"changes": [], "details": {"2": {"name": "new2"}}})
+
+    enrich.refresh(refresh_args(tmp_path))
+
+    assert read_jsonl(tmp_path / "titles_enriched.jsonl")[0]["title"] == "new2"
+    assert json.loads((tmp_path / "changed_ids.json").read_text()) == [2]
+    assert json.loads((tmp_path / "watermark.json").read_text())["pending"] == {}
+
+def test_refresh_drops_pending_after_max_tries(tmdb_stub, tmp_path, capsys):
+    write_jsonl(tmp_path / "titles_raw.jsonl", [{"series_id": 2}, {"series_id": 4}])
+    write_jsonl(tmp_path / "titles_enriched.jsonl", [{"series_id": 2, "title": "old2"}, {"series_id": 4, "title": "old4"}])
+    last_try = enrich.MAX_PENDING_TRIES - 1
+    (tmp_path / "watermark.json").write_text(json.dumps({"last_refresh": TODAY.isoformat(), "pending": {"2": last_try, "4": 1}}))
+    tmdb_stub({"changes": [], "errors": {"2": 400, "4": 400}})
+
+    enrich.refresh(refresh_args(tmp_path))
+
+    assert json.loads((tmp_path / "watermark.json").read_text())["pending"] == {"4": 2}
+    assert "Dropped ids: [2]" in capsys.readouterr().out
+    assert read_jsonl(tmp_path / "titles_enriched.jsonl")[0] == {"series_id": 2, "title": "old2"}
+
+def test_refresh_uses_utc_date_near_midnight(tmdb_stub, tmp_path, monkeypatch):
+    # 2026-10-18 00:30 UTC+3 = 2026-10-17 21:30 UTC: TMDB hâlâ 17'sinde
+    frozen = datetime(2026, 10, 17, 21, 30, tzinfo=timezone.utc)
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return frozen.astimezone(tz) if tz else frozen.astimezone(timezone(timedelta(hours=3))).replace(tzinfo=None)
+
+    monkeypatch.setattr(enrich, "datetime", FrozenDatetime)
+    write_jsonl(tmp_path / "titles_raw.jsonl", [{"series_id": 1}])
+    write_jsonl(tmp_path / "titles_enriched.jsonl", [{"series_id": 1, "title": "old1"}])
+    (tmp_path / "watermark.json").write_text(json.dumps({"last_refresh": "2026-10-16", "pending": {}}))
+    state = tmdb_stub({"changes": []})
+
+    enrich.refresh(refresh_args(tmp_path))
+
+    windows = {(q["start_date"], q["end_date"]) for path, q in state.requests if path == "/tv/changes"}
+    assert windows == {("2026-10-16", "2026-10-17")}
+    assert json.loads((tmp_path / "watermark.json").read_text())["last_refresh"] == "2026-10-17"
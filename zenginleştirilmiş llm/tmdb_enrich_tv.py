@@ -1,16 +1,31 @@
 import os
+import sys
 import json
 import time
 import argparse
-from typing import Dict, Any, Optional
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Any, Optional, List, Set, Tuple
 
 import requests
 from tqdm import tqdm
 from dotenv import load_dotenv
 from pathlib import Path
 
+# ortak JSONL/store yardımcıları data/ altında
+sys.path.append(str(Path(__file__).resolve().parents[1] / "data"))
+from title_store import merge_jsonl_records
+
 TMDB_API_BASE = "https://api.themoviedb.org/3"
 
+# /tv/changes tek istekte en fazla 14 günlük aralık kabul eder
+CHANGES_MAX_DAYS = 14
+
+# --refresh: bir id en fazla bu kadar çalıştırma boyunca pending'de tekrar denenir
+MAX_PENDING_TRIES = 5
+
+class TMDBNotFound(RuntimeError):
+    """404: dizi TMDB'den silinmiş ya da id geçersiz; tekrar denemenin anlamı yok."""
+
 def load_env():
     # Windows/VS Code için garanti .env okuma
     load_dotenv(Path(__file__).with_name(".env"))
@@ -23,7 +38,8 @@ def tmdb_headers() -> Dict[str, str]:
     return headers
 
 def tmdb_get(path: str, params: Optional[Dict[str, Any]] = None, max_retries: int = 5) -> Dict[str, Any]:
-    url = f"{TMDB_API_BASE}{path}"
+    # TMDB_API_BASE env ile yerel bir stub sunucusuna yönlendirilebilir (test için)
+    url = f"{os.getenv('TMDB_API_BASE', TMDB_API_BASE)}{path}"
     headers = tmdb_headers()
     params = params or {}
 
@@ -53,6 +69,8 @@ def tmdb_get(path: str, params: Optional[Dict[str, Any]] = None, max_retries: in
             err = r.json()
         except Exception:
             err = {"raw": r.text[:300]}
+        if r.status_code == 404:
+            raise TMDBNotFound(f"TMDB error 404: {err}")
         raise RuntimeError(f"TMDB error {r.status_code}: {err}")
 
     raise RuntimeError("Max retries exceeded")
@@ -150,6 +168,132 @@ def enrich_one(series_id: int, language: str, include_credits: bool) -> Dict[str
 
     return enriched
 
+def read_jsonl_ids(path: str) -> List[int]:
+    """JSONL dosyasındaki series_id (veya id) değerlerini sırayla döndürür."""
+    ids = []
+    if not os.path.exists(path):
+        return ids
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            sid = safe_int(obj.get("series_id") or obj.get("id"))
+            if sid is not None:
+                ids.append(sid)
+    return ids
+
+def load_watermark(path: str) -> Tuple[Optional[date], Dict[int, int]]:
+    """
+    (son yenileme tarihi, {bekleyen id: başarısız deneme sayısı}) döner. Bekleyen id'ler
+    önceki çalıştırmalarda zenginleştirilemeyenlerdir; watermark onları geçtiği için
+    sonraki çalıştırmalarda akıştan bağımsız olarak yeniden denenirler.
+    """
+    if not os.path.exists(path):
+        return None, {}
+    with open(path, "r", encoding="utf-8") as f:
+        obj = json.load(f)
+    last = obj.get("last_refresh")
+    pending = {}
+    for sid, tries in (obj.get("pending") or {}).items():
+        sid = safe_int(sid)
+        if sid is not None:
+            pending[sid] = safe_int(tries, 0)
+    return (date.fromisoformat(last) if last else None), pending
+
+def save_watermark(path: str, day: date, pending: Dict[int, int]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"last_refresh": day.isoformat(), "pending": {str(k): pending[k] for k in sorted(pending)}}, f)
+
+def utc_today() -> date:
+    # /tv/changes start_date/end_date UTC gündür; yerel tarih (örn. UTC+3'te gece yarısından sonra)
+    # bir gün ileride olabilir ve watermark o günün kalanındaki değişiklikleri atlar
+    return datetime.now(timezone.utc).date()
+
+def fetch_changed_ids(start: date, end: date, sleep: float) -> Set[int]:
+    """
+    /tv/changes akışını [start, end] aralığı için sayfa sayfa okur.
+    TMDB aralığı 14 günle sınırladığı için aralık pencerelere bölünür.
+    """
+    changed = set()
+    win_start = start
+    while win_start <= end:
+        win_end = min(win_start + timedelta(days=CHANGES_MAX_DAYS - 1), end)
+        page = 1
+        while True:
+            data = tmdb_get("/tv/changes", params={
+                "start_date": win_start.isoformat(),
+                "end_date": win_end.isoformat(),
+                "page": page,
+            })
+            for item in data.get("results", []) or []:
+                sid = safe_int(item.get("id"))
+                if sid is not None:
+                    changed.add(sid)
+            if page >= (data.get("total_pages") or 1):
+                break
+            page += 1
+            time.sleep(sleep)
+        win_start = win_end + timedelta(days=1)
+    return changed
+
+def refresh(args) -> None:
+    """
+    Artımlı yenileme: watermark'tan bugüne kadar /tv/changes'te görünen
+    ve bizim katalogda olan id'leri yeniden zenginleştirir, outfile'a merge eder,
+    değişen id'leri sonraki aşamalar (doc_text, embedding) için yazar.
+    """
+    today = utc_today()
+    last, pending = load_watermark(args.watermark)
+    if args.since:
+        start = date.fromisoformat(args.since)
+    else:
+        start = last or (today - timedelta(days=1))
+
+    catalog = set(read_jsonl_ids(args.infile)) | set(read_jsonl_ids(args.outfile))
+    changed = fetch_changed_ids(start, today, args.sleep)
+    targets = sorted((changed & catalog) | set(pending))
+    print(f"Changes since {start.isoformat()}: {len(changed)} | in catalog: {len(changed & catalog)} | pending: {len(pending)}")
+
+    updates = {}
+    failed = {}
+    dropped = []
+    for sid in tqdm(targets, desc="Refresh TV"):
+        try:
+            updates[sid] = enrich_one(sid, args.language, args.include_credits)
+        except TMDBNotFound as e:
+            # silinmiş dizi: eski kayıt kalır ama tekrar denenmez
+            print(f"skip {sid} (not found, dropped): {e}")
+            dropped.append(sid)
+        except Exception as e:
+            # eski iyi kaydı hata satırıyla ezmeyelim; id sonraki çalıştırmalarda tekrar denenir
+            tries = pending.get(sid, 0) + 1
+            if tries >= MAX_PENDING_TRIES:
+                print(f"skip {sid} (failed {tries} times, dropped): {e}")
+                dropped.append(sid)
+            else:
+                print(f"skip {sid} (try {tries}/{MAX_PENDING_TRIES}): {e}")
+                failed[sid] = tries
+        time.sleep(args.sleep)
+
+    merge_jsonl_records(args.outfile, updates)
+
+    with open(args.changed_out, "w", encoding="utf-8") as f:
+        json.dump(sorted(updates), f)
+
+    # watermark ancak merge başarılı olduktan sonra ilerler; başarısız id'ler pending'de kalır
+    save_watermark(args.watermark, today, failed)
+
+    print(f"Done. Refreshed: {len(updates)} | failed (pending): {len(failed)} | dropped: {len(dropped)}")
+    if dropped:
+        print(f"Dropped ids: {sorted(dropped)}")
+    print(f"Output: {args.outfile}")
+    print(f"Changed ids: {args.changed_out}")
+
 def main():
     load_env()
 
@@ -161,11 +305,19 @@ def main():
     parser.add_argument("--include_credits", action="store_true", help="Also call /credits for cast")
     parser.add_argument("--start", type=int, default=0, help="Start line index (0-based)")
     parser.add_argument("--limit", type=int, default=0, help="Limit how many items to process (0=all)")
+    parser.add_argument("--refresh", action="store_true", help="Incremental refresh via /tv/changes since watermark")
+    parser.add_argument("--watermark", default="tmdb_changes_watermark.json", help="Watermark file for --refresh")
+    parser.add_argument("--since", default=None, help="Override watermark start date (YYYY-MM-DD)")
+    parser.add_argument("--changed_out", default="changed_ids.json", help="Refreshed ids for downstream stages")
     args = parser.parse_args()
 
     if not os.getenv("TMDB_BEARER") and not os.getenv("TMDB_API_KEY"):
         raise SystemExit("TMDB_BEARER veya TMDB_API_KEY yok. .env kontrol et.")
 
+    if args.refresh:
+        refresh(args)
+        return
+
     # input read
     items = []
     with open(args.infile, "r", encoding="utf-8") as f:
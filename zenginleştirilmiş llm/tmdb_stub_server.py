@@ -0,0 +1,113 @@
+# tmdb_stub_server.py
+# Amaç: tmdb_enrich_tv.py --refresh akışını gerçek TMDB'ye gitmeden denemek.
+# /tv/changes, /tv/{id} ve /tv/{id}/keywords uçlarını sabit bir fixture'dan cevaplar.
+#
+# Kullanım:
+#   python tmdb_stub_server.py --fixture stub.json --port 8765
+#   TMDB_API_BASE=http://127.0.0.1:8765/3 TMDB_API_KEY=x python tmdb_enrich_tv.py --refresh ...
+#
+# Fixture yapısı:
+#   {"changes": [{"id": 1, "date": "2026-10-01"}, ...],
+#    "details": {"1": {"name": "...", ...}, ...},
+#    "keywords": {"1": ["monster", ...]},
+#    "errors": {"2": 400}}
+# details'te olmayan id'ler 404 döner; errors'taki id'ler verilen status ile döner.
+
+import json
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Tuple
+from urllib.parse import urlparse, parse_qs
+
+class StubState:
+    def __init__(self, fixture: Dict[str, Any], page_size: int = 2):
+        self.changes = fixture.get("changes") or []
+        self.details = {str(k): v for k, v in (fixture.get("details") or {}).items()}
+        self.keywords = {str(k): v for k, v in (fixture.get("keywords") or {}).items()}
+        self.errors = {str(k): int(v) for k, v in (fixture.get("errors") or {}).items()}
+        self.page_size = page_size
+        # testlerde kontrol için: (path, query) listesi
+        self.requests: List[Tuple[str, Dict[str, str]]] = []
+
+    def changes_page(self, start: str, end: str, page: int) -> Dict[str, Any]:
+        # ISO tarihler string olarak da doğru sıralanır
+        ids = []
+        for c in self.changes:
+            if start <= c["date"] <= end and c["id"] not in ids:
+                ids.append(c["id"])
+        total_pages = max(1, -(-len(ids) // self.page_size))
+        chunk = ids[(page - 1) * self.page_size:page * self.page_size]
+        return {
+            "results": [{"id": sid, "adult": False} for sid in chunk],
+            "page": page,
+            "total_pages": total_pages,
+            "total_results": len(ids),
+        }
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def send_json(self, status: int, obj: Dict[str, Any]) -> None:
+            body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            path = url.path[len("/3"):] if url.path.startswith("/3/") else url.path
+            state.requests.append((path, query))
+
+            parts = [p for p in path.split("/") if p]
+            if parts == ["tv", "changes"]:
+                page = int(query.get("page", 1))
+                return self.send_json(200, state.changes_page(query["start_date"], query["end_date"], page))
+
+            if len(parts) >= 2 and parts[0] == "tv" and parts[1] in state.errors:
+                return self.send_json(state.errors[parts[1]], {"status_code": 7, "status_message": "stub error"})
+
+            if len(parts) >= 2 and parts[0] == "tv" and parts[1] in state.details:
+                sid = parts[1]
+                if len(parts) == 2:
+                    return self.send_json(200, dict(state.details[sid], id=int(sid)))
+                if parts[2:] == ["keywords"]:
+                    names = state.keywords.get(sid) or []
+                    return self.send_json(200, {"id": int(sid), "results": [{"name": n} for n in names]})
+
+            self.send_json(404, {"status_code": 34, "status_message": "The resource you requested could not be found."})
+
+    return Handler
+
+def start_stub(fixture: Dict[str, Any], page_size: int = 2, port: int = 0):
+    """Stub'ı arka planda başlatır: (server, state, base_url). İş bitince server.shutdown()."""
+    state = StubState(fixture, page_size)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/3"
+    return server, state, base_url
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixture", required=True, help="Stub fixture JSON")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--page_size", type=int, default=20, help="/tv/changes page size")
+    args = parser.parse_args()
+
+    with open(args.fixture, "r", encoding="utf-8") as f:
+        fixture = json.load(f)
+
+    server, _, base_url = start_stub(fixture, args.page_size, args.port)
+    print(f"TMDB stub: {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()